@@ -1,19 +1,32 @@
 from __future__ import annotations
 import os
+import re
 import sys
 import time
 import json
 import logging
 import argparse
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib3.exceptions import InvalidHeader
 import asyncio
+import io
 import html
+import functools
 from typing import Optional, Dict, Any, List
 from datetime import datetime, timedelta, timezone
 from collections import Counter
+from operator import itemgetter
 from telethon import TelegramClient
 from telethon.sessions import StringSession
 
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:  # orjson не установлен — используем стандартный json
+    json_loads = json.loads
+
 API_URL = "https://api.hh.ru/vacancies"
 DEFAULT_OUTPUT_PATH = os.environ.get("OUTPUT_PATH", "/data/it_vacancies_report.txt")
 
@@ -22,6 +35,7 @@ API_ID = os.getenv("API_ID")
 API_HASH = os.getenv("API_HASH")
 SESSION_STRING = os.getenv("TELETHON_SESSION_STRING")
 DEST_CHANNEL = os.getenv("DEST_CHANNEL")
+TELEGRAM_MESSAGE_LIMIT = 4000
 
 # IT-специальности
 IT_SPECIALIZATIONS = {
@@ -31,15 +45,40 @@ IT_SPECIALIZATIONS = {
     "javascript": "JavaScript разработчик"
 }
 
+# Правила определения специализации: (ключевые слова, исключения, метка).
+# Проверяются по порядку, срабатывает первое подходящее правило.
+SPECIALIZATION_RULES = (
+    (("python",), (), "🐍 Python разработчик"),
+    (("java",), ("javascript", "js"), "☕ Java разработчик"),
+    (("frontend", "react", "angular", "vue", "javascript", "js"), (), "🎨 Frontend разработчик"),
+)
+DEFAULT_SPECIALIZATION = "💻 IT-разработчик"
+
 SEARCH_KEYWORDS = list(IT_SPECIALIZATIONS.keys())
 SEARCH_TEXT = " OR ".join(SEARCH_KEYWORDS)
 
+# Символы валют для отчета
+CURRENCY_SYMBOLS = {
+    'RUR': '₽',
+    'RUB': '₽',
+    'USD': '$',
+    'EUR': '€'
+}
+
 # Фильтры
 MIN_SALARY = 80000
 ONLY_WITH_SALARY = False
 
+# Максимальная длина требований/обязанностей в отчете
+SNIPPET_MAX_LENGTH = 120
+
 # Целевые города
 TARGET_CITIES = ["Москва", "Санкт-Петербург", "Москва и Московская область", "Санкт-Петербург и область"]
+# Для проверки по подстроке достаточно названий, не содержащих другие целевые города
+TARGET_CITY_SUBSTRINGS = tuple(
+    city.lower() for city in TARGET_CITIES
+    if not any(other != city and other.lower() in city.lower() for other in TARGET_CITIES)
+)
 
 # Сеть/таймауты/поведение
 PER_PAGE = 50
@@ -49,7 +88,12 @@ TIMEOUT = (CONNECT_TIMEOUT, READ_TIMEOUT)
 
 MAX_PAGE_ATTEMPTS = 6
 INITIAL_BACKOFF = 1.0
-PAGE_PAUSE = 0.5
+MAX_PAGES = 20
+PAGE_CONCURRENCY = 8
+
+MOSCOW_TZ = timezone(timedelta(hours=3))
+
+_TAG_RE = re.compile(r"<[^>]+>")
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
 logger = logging.getLogger("it_vacancies")
@@ -106,6 +150,21 @@ async def init_telegram():
         print(f"❌ Ошибка инициализации Telegram клиента: {e}")
         return False
 
+def split_message(text: str, limit: int = TELEGRAM_MESSAGE_LIMIT) -> List[str]:
+    """Разбивает текст на части не длиннее limit, по возможности по границе строки"""
+    parts = []
+    i = 0
+    n = len(text)
+    while i < n:
+        end = min(i + limit, n)
+        if end < n:
+            cut = text.rfind('\n', i, end)
+            if cut > i:
+                end = cut + 1
+        parts.append(text[i:end])
+        i = end
+    return parts
+
 async def send_to_telegram(report: str, vacancies_count: int):
     """Отправка отчета в Telegram канал"""
     if not tg_client or not DEST_CHANNEL:
@@ -113,31 +172,11 @@ async def send_to_telegram(report: str, vacancies_count: int):
         return
 
     try:
-        # Если отчет слишком длинный, разбиваем на части
-        if len(report) > 4000:
-            parts = []
-            current_part = ""
-            
-            for line in report.split('\n'):
-                if len(current_part + line + '\n') > 4000:
-                    parts.append(current_part)
-                    current_part = line + '\n'
-                else:
-                    current_part += line + '\n'
-            
-            if current_part:
-                parts.append(current_part)
-            
-            # Отправляем первую часть
-            await tg_client.send_message(DEST_CHANNEL, parts[0], parse_mode='md', link_preview=False)
-            
-            # Отправляем остальные части с задержкой
-            for part in parts[1:]:
-                await asyncio.sleep(1)
-                await tg_client.send_message(DEST_CHANNEL, part, parse_mode='md', link_preview=False)
-        else:
-            # Отправляем весь отчет одним сообщением
-            await tg_client.send_message(DEST_CHANNEL, report, parse_mode='md', link_preview=False)
+        # Если отчет слишком длинный, он будет разбит на несколько частей.
+        # Отправляем части по порядку без фиксированной паузы:
+        # при FloodWait Telethon сам дождется нужное время (flood_sleep_threshold)
+        for part in split_message(report):
+            await tg_client.send_message(DEST_CHANNEL, part, parse_mode='md', link_preview=False)
 
         print(f"✅ Отчет отправлен в Telegram канал {DEST_CHANNEL}")
         print(f"📊 Вакансий в отчете: {vacancies_count}")
@@ -158,13 +197,64 @@ def validate_contact(contact: Optional[str]) -> bool:
         return False
     return True
 
+def backoff_delay(retry_number: int) -> float:
+    """Пауза перед повтором номер retry_number (с 1): INITIAL_BACKOFF, затем удваивается до 60с"""
+    return min(INITIAL_BACKOFF * 2 ** (retry_number - 1), 60)
+
+class HHRetry(Retry):
+    """Retry с паузой уже перед первым повтором и логированием каждого повтора"""
+
+    def get_backoff_time(self) -> float:
+        # Штатный Retry не ждет перед первым повтором — для API с rate limit это плохо
+        retries = len(self.history)
+        return backoff_delay(retries) if retries else 0
+
+    def get_retry_after(self, response) -> Optional[float]:
+        # Некорректный или уже прошедший Retry-After — используем обычную экспоненциальную паузу
+        try:
+            wait = super().get_retry_after(response)
+        except InvalidHeader:
+            return None
+        return wait if wait and wait > 0 else None
+
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        new_retry = super().increment(method, url, response, error, _pool, _stacktrace)
+        attempt = len(new_retry.history)
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            wait = new_retry.get_retry_after(response)
+            if wait is None:
+                wait = new_retry.get_backoff_time()
+            logger.warning("HTTP %s for %s (attempt %d). Retry-After=%s. Waiting %.1fs",
+                           response.status, url, attempt, retry_after, wait)
+        else:
+            logger.warning("Request error for %s (attempt %d): %s. Waiting %.1fs",
+                           url, attempt, error, new_retry.get_backoff_time())
+        return new_retry
+
 def make_session(user_agent: str) -> requests.Session:
     s = requests.Session()
     s.headers.update({
         "User-Agent": user_agent,
-        "Accept": "application/json"
+        "Accept": "application/json",
+        "Accept-Encoding": "gzip, deflate",
+        "Connection": "keep-alive"
     })
     s.trust_env = True
+
+    # Повторы при 429/5xx и сетевых ошибках: пауза INITIAL_BACKOFF, удваивается до 60с,
+    # Retry-After от сервера имеет приоритет
+    retry = HHRetry(
+        total=MAX_PAGE_ATTEMPTS - 1,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset({"GET"}),
+        respect_retry_after_header=True
+    )
+    
+    # Один хост (api.hh.ru): держим пул keep-alive соединений для параллельных запросов
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=16, max_retries=retry)
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
     return s
 
 def get_target_period() -> tuple[datetime, datetime]:
@@ -172,8 +262,7 @@ def get_target_period() -> tuple[datetime, datetime]:
     now_utc = datetime.now(timezone.utc)
     
     # Переводим в московское время (UTC+3) для расчета периода
-    moscow_offset = timedelta(hours=3)
-    now_moscow = now_utc + moscow_offset
+    now_moscow = now_utc.astimezone(MOSCOW_TZ)
     
     # Сегодня в 20:00 по Москве
     today_20_moscow = now_moscow.replace(hour=20, minute=0, second=0, microsecond=0)
@@ -182,13 +271,14 @@ def get_target_period() -> tuple[datetime, datetime]:
     yesterday_20_moscow = today_20_moscow - timedelta(days=1)
     
     # Переводим обратно в UTC для сравнения
-    yesterday_20_utc = yesterday_20_moscow - moscow_offset
-    today_20_utc = today_20_moscow - moscow_offset
+    yesterday_20_utc = yesterday_20_moscow.astimezone(timezone.utc)
+    today_20_utc = today_20_moscow.astimezone(timezone.utc)
     
     return yesterday_20_utc, today_20_utc
 
+@functools.lru_cache(maxsize=8192)
 def parse_date(date_string: str) -> datetime:
-    """Парсит дату из строки в datetime объект с временной зоной"""
+    """Парсит дату из строки в datetime объект с временной зоной (результат кешируется)"""
     try:
         if date_string.endswith('Z'):
             date_string = date_string[:-1] + '+00:00'
@@ -202,6 +292,10 @@ def parse_date(date_string: str) -> datetime:
         logger.warning(f"Failed to parse date {date_string}: {e}")
         return datetime.min.replace(tzinfo=timezone.utc)
 
+def format_amount(n: int) -> str:
+    """Форматирует число с пробелами между разрядами: 150000 -> '150 000'"""
+    return format(n, ',').replace(',', ' ')
+
 def format_salary(salary_data: Dict[str, Any]) -> str:
     """Форматирует зарплату в красивый вид"""
     if not salary_data:
@@ -209,60 +303,55 @@ def format_salary(salary_data: Dict[str, Any]) -> str:
     
     parts = []
     if salary_data.get('from'):
-        parts.append(f"{salary_data['from']:,}".replace(',', ' '))
+        parts.append(format_amount(salary_data['from']))
     if salary_data.get('to'):
-        parts.append(f"{salary_data['to']:,}".replace(',', ' '))
+        parts.append(format_amount(salary_data['to']))
     
     salary_str = " - ".join(parts)
     currency = salary_data.get('currency', 'RUR')
     
-    currency_symbols = {
-        'RUR': '₽',
-        'RUB': '₽',
-        'USD': '$',
-        'EUR': '€'
-    }
-    
-    symbol = currency_symbols.get(currency, currency)
+    symbol = CURRENCY_SYMBOLS.get(currency, currency)
     return f"💰 {salary_str} {symbol}"
 
 def format_date(date_string: str) -> str:
     """Форматирует дату в читаемый вид (в московском времени)"""
     try:
         dt = parse_date(date_string)
-        moscow_tz = timezone(timedelta(hours=3))
-        dt_moscow = dt.astimezone(moscow_tz)
+        dt_moscow = dt.astimezone(MOSCOW_TZ)
         return dt_moscow.strftime("📅 %d.%m.%Y %H:%M")
     except:
         return "📅 дата не указана"
 
 def clean_html(text: str) -> str:
-    """Очищает HTML теги из текста"""
-    if not text:
-        return ""
-    import re
-    return re.sub(r'<[^>]+>', '', text)
-
-def detect_specialization(vacancy_name: str, snippet: Dict) -> str:
-    """Определяет специализацию вакансии"""
-    name_lower = vacancy_name.lower()
-    snippet_lower = (snippet.get('requirement', '') + ' ' + snippet.get('responsibility', '')).lower()
-    full_text = name_lower + ' ' + snippet_lower
-    
-    if 'python' in full_text:
-        return "🐍 Python разработчик"
-    elif 'java' in full_text and 'javascript' not in full_text and 'js' not in full_text:
-        return "☕ Java разработчик"
-    elif 'frontend' in full_text or 'react' in full_text or 'angular' in full_text or 'vue' in full_text:
-        return "🎨 Frontend разработчик"
-    elif 'javascript' in full_text or 'js' in full_text:
-        return "🎨 Frontend разработчик"
-    else:
-        return "💻 IT-разработчик"
+    """Очищает HTML теги и раскодирует HTML-сущности (&amp;, &nbsp; и т.п.)"""
+    return html.unescape(_TAG_RE.sub('', text)) if text else ""
+
+def truncate(text: str, limit: int = SNIPPET_MAX_LENGTH) -> str:
+    """Обрезает текст до limit символов, добавляя многоточие"""
+    return text[:limit] + "..." if len(text) > limit else text
+
+def build_spec_text(vacancy_name: str, snippet: Dict) -> str:
+    """Собирает текст вакансии в нижнем регистре для detect_specialization"""
+    return ' '.join((
+        vacancy_name or '',
+        snippet.get('requirement') or '',
+        snippet.get('responsibility') or ''
+    )).lower()
+
+def detect_specialization(text: str) -> str:
+    """Определяет специализацию вакансии по тексту из build_spec_text"""
+    for keys, excludes, label in SPECIALIZATION_RULES:
+        if any(k in text for k in keys) and not any(e in text for e in excludes):
+            return label
+    return DEFAULT_SPECIALIZATION
 
 def is_target_city(city_name: str) -> bool:
     """Проверяет, является ли город целевым"""
-    return any(target_city.lower() in city_name.lower() for target_city in TARGET_CITIES)
+    city = city_name.lower()
+    for target in TARGET_CITY_SUBSTRINGS:
+        if target in city:
+            return True
+    return False
 
 def filter_vacancies(vacancies: List[Dict], period_start: datetime, period_end: datetime) -> List[Dict]:
     """Фильтрует вакансии по периоду и городам"""
@@ -271,7 +360,7 @@ def filter_vacancies(vacancies: List[Dict], period_start: datetime, period_end:
     for vacancy in vacancies:
         try:
             # Фильтр по периоду
-            published_at = parse_date(vacancy['published_at'])
+            published_at = vacancy['_published_dt']
             if not (period_start <= published_at <= period_end):
                 continue
                 
@@ -287,142 +376,145 @@ def filter_vacancies(vacancies: List[Dict], period_start: datetime, period_end:
             continue
     
     # Сортируем от новых к старым
-    filtered.sort(key=lambda v: parse_date(v['published_at']), reverse=True)
+    filtered.sort(key=itemgetter('_published_dt'), reverse=True)
     return filtered
 
-def generate_beautiful_report(vacancies: List[Dict], total_found: int, period_start: datetime, period_end: datetime) -> str:
-    """Генерирует красивый отчет для IT-вакансий"""
+def generate_beautiful_report(vacancies: List[Dict], total_found: int, period_start: datetime, period_end: datetime) -> tuple[str, Dict[str, Counter]]:
+    """Генерирует красивый отчет для IT-вакансий.
+
+    Возвращает текст отчета и статистику {"city_stats": ..., "spec_stats": ...}
+    """
     
     # Конвертируем периоды в московское время для отображения
-    moscow_tz = timezone(timedelta(hours=3))
-    period_start_moscow = period_start.astimezone(moscow_tz)
-    period_end_moscow = period_end.astimezone(moscow_tz)
+    period_start_moscow = period_start.astimezone(MOSCOW_TZ)
+    period_end_moscow = period_end.astimezone(MOSCOW_TZ)
     
     period_str = f"{period_start_moscow.strftime('%d.%m.%Y %H:%M')} - {period_end_moscow.strftime('%d.%m.%Y %H:%M')}"
     
-    if not vacancies:
-        return f"""❌ За указанный период ({period_str}) IT-вакансии не найдены.""".replace(',', ' ')
-    
     # Собираем статистику
     cities = [v['area']['name'] for v in vacancies if v.get('area')]
     city_stats = Counter(cities)
     
-    specializations = [detect_specialization(v['name'], v.get('snippet', {})) for v in vacancies]
+    specializations = [v['_spec'] for v in vacancies]
     spec_stats = Counter(specializations)
+    stats = {"city_stats": city_stats, "spec_stats": spec_stats}
+    
+    if not vacancies:
+        return f"""❌ За указанный период ({period_str}) IT-вакансии не найдены.""".replace(',', ' '), stats
     
     # Статистика по зарплатам
     salaries_with_info = [v for v in vacancies if v.get('salary')]
     
+    # Границы свежести вакансий (в секундах epoch) считаем один раз
+    now_utc = datetime.now(timezone.utc)
+    now_ts = now_utc.timestamp()
+    boundary_1h = now_ts - 3600
+    boundary_6h = now_ts - 21600
+    boundary_today = now_utc.astimezone(MOSCOW_TZ).replace(hour=0, minute=0, second=0, microsecond=0).timestamp()
+    
     # Формируем отчет
-    report = []
+    buf = io.StringIO()
+    write = buf.write  # локальная ссылка: метод вызывается много раз на вакансию
     
     # Заголовок и статистика
-    report.append("💻 **ОБЗОР IT-ВАКАНСИЙ**")
-    report.append("══════════════════════════════")
-    report.append("")
+    write("💻 **ОБЗОР IT-ВАКАНСИЙ**\n")
+    write("══════════════════════════════\n")
+    write("\n")
     
-    report.append("📈 **СТАТИСТИКА:**")
-    report.append(f"• Всего IT-вакансий найдено: **{total_found}**")
-    report.append(f"• Подходит под фильтры: **{len(vacancies)}**")
-    report.append(f"• Указана зарплата: **{len(salaries_with_info)}**")
-    report.append(f"• Период: **{period_str}**")
+    write("📈 **СТАТИСТИКА:**\n")
+    write(f"• Всего IT-вакансий найдено: **{total_found}**\n")
+    write(f"• Подходит под фильтры: **{len(vacancies)}**\n")
+    write(f"• Указана зарплата: **{len(salaries_with_info)}**\n")
+    write(f"• Период: **{period_str}**\n")
     
     # Статистика по специализациям
-    report.append(f"• Распределение: {', '.join(f'{spec.split()[-1]} ({count})' for spec, count in spec_stats.most_common())}")
+    write(f"• Распределение: {', '.join(f'{spec.split()[-1]} ({count})' for spec, count in spec_stats.most_common())}\n")
     
-    report.append("")
-    report.append("📋 **ВАКАНСИИ:**")
-    report.append("══════════════════════════════")
-    report.append("")
+    write("\n")
+    write("📋 **ВАКАНСИИ:**\n")
+    write("══════════════════════════════\n")
+    write("\n")
     
     # Детали по каждой вакансии
     for i, vacancy in enumerate(vacancies, 1):
-        specialization = detect_specialization(vacancy['name'], vacancy.get('snippet', {}))
+        specialization = vacancy['_spec']
         
-        report.append(f"**{i}. {specialization}**")
-        report.append(f"**{vacancy['name']}**")
-        report.append("─" * 30)
+        write(f"**{i}. {specialization}**\n")
+        write(f"**{vacancy['name']}**\n")
+        write("─" * 30 + "\n")
         
         # Ссылка
-        report.append(f"🔗 {vacancy['alternate_url']}")
+        write(f"🔗 {vacancy['alternate_url']}\n")
         
         # Дата публикации
         date_str = format_date(vacancy['published_at'])
-        vacancy_date = parse_date(vacancy['published_at'])
+        published_ts = vacancy['_published_ts']
         
         # Определяем, насколько свежая вакансия
-        now_utc = datetime.now(timezone.utc)
-        time_diff = now_utc - vacancy_date
-        
-        if time_diff.total_seconds() <= 3600:  # До 1 часа
+        if published_ts >= boundary_1h:  # До 1 часа
             date_str += " 🆕"
-        elif time_diff.total_seconds() <= 21600:  # До 6 часов
+        elif published_ts >= boundary_6h:  # До 6 часов
             date_str += " 🔥"
-        elif vacancy_date.date() == now_utc.date():  # Сегодня
+        elif published_ts >= boundary_today:  # Сегодня
             date_str += " ⭐"
         
-        report.append(f"{date_str}")
+        write(f"{date_str}\n")
         
         # Зарплата
-        report.append(f"{format_salary(vacancy.get('salary'))}")
+        write(f"{format_salary(vacancy.get('salary'))}\n")
         
         # Работодатель и город
-        report.append(f"🏢 **Компания:** {vacancy['employer']['name']}")
-        report.append(f"📍 **Город:** {vacancy['area']['name']}")
+        write(f"🏢 **Компания:** {vacancy['employer']['name']}\n")
+        write(f"📍 **Город:** {vacancy['area']['name']}\n")
         
         # Требования
-        requirement = clean_html(vacancy.get('snippet', {}).get('requirement', ''))
-        if requirement and len(requirement) > 5:
-            if len(requirement) > 120:
-                requirement = requirement[:120] + "..."
-            report.append(f"📝 **Требования:** {requirement}")
+        requirement = vacancy['_req']
+        if len(requirement) > 5:
+            write(f"📝 **Требования:** {requirement}\n")
         
         # Обязанности
-        responsibility = clean_html(vacancy.get('snippet', {}).get('responsibility', ''))
-        if responsibility and len(responsibility) > 5:
-            if len(responsibility) > 120:
-                responsibility = responsibility[:120] + "..."
-            report.append(f"💼 **Обязанности:** {responsibility}")
+        responsibility = vacancy['_resp']
+        if len(responsibility) > 5:
+            write(f"💼 **Обязанности:** {responsibility}\n")
         
-        report.append("")
-        report.append("══════════════════════════════")
-        report.append("")
+        write("\n")
+        write("══════════════════════════════\n")
+        write("\n")
     
     # Итоговая статистика
-    report.append("📊 **ИТОГИ ПОИСКА:**")
-    report.append("─" * 25)
+    write("📊 **ИТОГИ ПОИСКА:**\n")
+    write("─" * 25 + "\n")
     
     # Статистика по датам
     if vacancies:
-        newest_date = parse_date(vacancies[0]['published_at'])
-        oldest_date = parse_date(vacancies[-1]['published_at'])
-        newest_moscow = newest_date.astimezone(moscow_tz)
-        oldest_moscow = oldest_date.astimezone(moscow_tz)
+        newest_date = vacancies[0]['_published_dt']
+        oldest_date = vacancies[-1]['_published_dt']
+        newest_moscow = newest_date.astimezone(MOSCOW_TZ)
+        oldest_moscow = oldest_date.astimezone(MOSCOW_TZ)
         
         # Форматируем даты правильно
         newest_str = newest_moscow.strftime('%d.%m.%Y %H:%M')
         oldest_str = oldest_moscow.strftime('%d.%m.%Y %H:%M')
         
-        report.append(f"• Диапазон дат: {newest_str} - {oldest_str}")
+        write(f"• Диапазон дат: {newest_str} - {oldest_str}\n")
         
         # Количество свежих вакансий
-        now_utc = datetime.now(timezone.utc)
-        today_count = sum(1 for v in vacancies if parse_date(v['published_at']).date() == now_utc.date())
-        recent_count = sum(1 for v in vacancies if (now_utc - parse_date(v['published_at'])).total_seconds() <= 21600)
+        today_count = sum(1 for v in vacancies if v['_published_ts'] >= boundary_today)
+        recent_count = sum(1 for v in vacancies if v['_published_ts'] >= boundary_6h)
         
         if today_count > 0:
-            report.append(f"• Опубликовано сегодня: **{today_count}**")
+            write(f"• Опубликовано сегодня: **{today_count}**\n")
         if recent_count > 0:
-            report.append(f"• За последние 6 часов: **{recent_count}**")
+            write(f"• За последние 6 часов: **{recent_count}**\n")
     
-    report.append(f"• Города: {', '.join(f'{city} ({count})' for city, count in city_stats.most_common())}")
-    report.append(f"• Специализации: {', '.join(f'{spec.split()[-1]} ({count})' for spec, count in spec_stats.most_common())}")
+    write(f"• Города: {', '.join(f'{city} ({count})' for city, count in city_stats.most_common())}\n")
+    write(f"• Специализации: {', '.join(f'{spec.split()[-1]} ({count})' for spec, count in spec_stats.most_common())}\n")
     
-    report.append("")
-    report.append(f"🕒 **Отчет обновлен:** {datetime.now().strftime('%d.%m.%Y в %H:%M')}")
-    report.append("🔍 **Источник:** hh.ru")
+    write("\n")
+    write(f"🕒 **Отчет обновлен:** {datetime.now().strftime('%d.%m.%Y в %H:%M')}\n")
+    write("🔍 **Источник:** hh.ru")
     
-    return "\n".join(report)
+    return buf.getvalue(), stats
 
 def fetch_page(session: requests.Session, page: int, per_page: int) -> Optional[Dict[str, Any]]:
     """Получает одну страницу вакансий"""
@@ -435,7 +527,8 @@ def fetch_page(session: requests.Session, page: int, per_page: int) -> Optional[
         "only_with_salary": "false"
     }
     
-    backoff = INITIAL_BACKOFF
+    # Повторы при 429/5xx и сетевых ошибках выполняет HHRetry адаптера сессии;
+    # здесь повторяем только ответы с невалидным JSON
     for attempt in range(1, MAX_PAGE_ATTEMPTS + 1):
         try:
             logger.info(f"GET page={page} per_page={per_page} attempt={attempt}")
@@ -445,33 +538,47 @@ def fetch_page(session: requests.Session, page: int, per_page: int) -> Optional[
                 logger.error(f"400 Bad Request: {r.text[:512]}")
                 params_simple = {"text": "python", "per_page": per_page, "page": page}
                 r = session.get(API_URL, params=params_simple, timeout=TIMEOUT)
-                r.raise_for_status()
-                return {"json": r.json()}
-                
-            if r.status_code == 429:
-                ra = r.headers.get("Retry-After")
-                try:
-                    wait = float(ra) if ra and ra.isdigit() else backoff
-                except Exception:
-                    wait = backoff
-                logger.warning("429 Too Many Requests. Retry-After=%s. Waiting %.1fs", ra, wait)
-                time.sleep(wait)
-                backoff = min(backoff * 2, 60)
-                continue
-                
+            
             r.raise_for_status()
-            return {"json": r.json()}
+            return {"json": json_loads(r.content)}
             
         except requests.exceptions.RequestException as e:
-            logger.warning("RequestException on page %s (attempt %s): %s", page, attempt, e)
+            logger.error("Failed to fetch page %s: %s", page, e)
+            return None
+        
+        except ValueError as e:
+            # Невалидный JSON в ответе
+            logger.warning("Invalid JSON on page %s (attempt %s): %s", page, attempt, e)
             if attempt == MAX_PAGE_ATTEMPTS:
                 logger.error("Failed to fetch page %s after %s attempts", page, MAX_PAGE_ATTEMPTS)
                 return None
-            time.sleep(backoff)
-            backoff = min(backoff * 2, 60)
+            time.sleep(backoff_delay(attempt))
     
     return None
 
+def build_vacancy_info(v: Dict[str, Any]) -> Dict[str, Any]:
+    """Извлекает из ответа API нужные для отчета поля вакансии"""
+    emp = v.get("employer") or {}
+    area = v.get("area") or {}
+    snippet = v.get("snippet") or {}
+    published_dt = parse_date(v.get("published_at"))
+    
+    return {
+        "id": v.get("id"),
+        "name": v.get("name"),
+        "alternate_url": v.get("alternate_url"),
+        "published_at": v.get("published_at"),
+        "_published_dt": published_dt,
+        "_published_ts": published_dt.timestamp(),
+        "salary": v.get("salary"),
+        "employer": {"id": emp.get("id"), "name": emp.get("name")},
+        "area": {"id": area.get("id"), "name": area.get("name")},
+        "snippet": snippet,
+        "_spec": detect_specialization(build_spec_text(v.get("name"), snippet)),
+        "_req": truncate(clean_html(snippet.get("requirement"))),
+        "_resp": truncate(clean_html(snippet.get("responsibility")))
+    }
+
 async def collect_once(contact: str, limit: int, out_path: str) -> int:
     """Основная функция сбора вакансий"""
     user_agent = build_user_agent(contact)
@@ -482,81 +589,49 @@ async def collect_once(contact: str, limit: int, out_path: str) -> int:
 
     # Определяем период для фильтрации
     period_start, period_end = get_target_period()
-    moscow_tz = timezone(timedelta(hours=3))
-    period_start_moscow = period_start.astimezone(moscow_tz)
-    period_end_moscow = period_end.astimezone(moscow_tz)
+    period_start_moscow = period_start.astimezone(MOSCOW_TZ)
+    period_end_moscow = period_end.astimezone(MOSCOW_TZ)
     
     logger.info(f"Filter period (Moscow): {period_start_moscow} - {period_end_moscow}")
 
-    page = 0
     per_page = PER_PAGE
     all_vacancies = []
     total_found = 0
 
     os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
 
-    # Собираем вакансии
-    while len(all_vacancies) < limit * 3 and page < 20:
-        result = fetch_page(session, page, per_page)
-        
-        if result is None:
-            logger.warning("Stopping collection due to repeated errors.")
-            break
-            
-        if "error" in result:
-            logger.error("Server returned error: %s", result.get("text", "unknown"))
-            break
-            
-        data = result.get("json", {})
-        
-        if page == 0:
-            total_found = data.get("found", 0)
-            logger.info("Total IT vacancies found: %d", total_found)
-        
-        items = data.get("items", [])
-        if not items:
-            logger.info("No more items - stopping.")
-            break
-
-        for v in items:
-            try:
-                salary = v.get("salary")
-                salary_repr = None
-                if salary:
-                    salary_repr = {
-                        "from": salary.get("from"),
-                        "to": salary.get("to"),
-                        "currency": salary.get("currency"),
-                        "gross": salary.get("gross")
-                    }
-                
-                emp = v.get("employer") or {}
-                area = v.get("area") or {}
-                
-                vacancy_info = {
-                    "id": v.get("id"),
-                    "name": v.get("name"),
-                    "alternate_url": v.get("alternate_url"),
-                    "published_at": v.get("published_at"),
-                    "salary": salary_repr,
-                    "employer": {"id": emp.get("id"), "name": emp.get("name")},
-                    "area": {"id": area.get("id"), "name": area.get("name")},
-                    "snippet": v.get("snippet") or {}
-                }
-                
-                all_vacancies.append(vacancy_info)
-                
-            except Exception as e:
-                logger.warning(f"Error processing vacancy: {e}")
-                continue
+    # Первая страница: узнаем общее количество страниц
+    first = await asyncio.to_thread(fetch_page, session, 0, per_page)
+    pages = []
+    if first is None:
+        logger.warning("Stopping collection due to repeated errors.")
+    else:
+        data = first.get("json", {})
+        total_found = data.get("found", 0)
+        logger.info("Total IT vacancies found: %d", total_found)
+        pages.append(data)
+
+        # Остальные страницы запрашиваем параллельно (не больше, чем нужно для limit * 3)
+        pages_needed = -(-limit * 3 // per_page)
+        pages_total = min(data.get("pages", 0), MAX_PAGES, pages_needed)
+        if pages_total > 1:
+            sem = asyncio.Semaphore(PAGE_CONCURRENCY)
+
+            async def fetch_limited(page: int) -> Optional[Dict[str, Any]]:
+                async with sem:
+                    return await asyncio.to_thread(fetch_page, session, page, per_page)
+
+            results = await asyncio.gather(*(fetch_limited(p) for p in range(1, pages_total)))
+            for page, result in enumerate(results, 1):
+                if result is None:
+                    logger.warning("Skipping page %d due to repeated errors.", page)
+                    continue
+                pages.append(result.get("json", {}))
+            logger.info("Fetched %d of %d pages", len(pages), pages_total)
 
-        page += 1
-        pages_total = data.get("pages", 0)
-        if page >= pages_total:
-            logger.info("Reached last page %d of %d", page, pages_total)
-            break
-            
-        time.sleep(PAGE_PAUSE)
+    # Собираем вакансии
+    for data in pages:
+        all_vacancies.extend([build_vacancy_info(v) for v in data.get("items", [])])
 
     logger.info("Collected %d vacancies before filtering", len(all_vacancies))
 
@@ -567,12 +642,13 @@ async def collect_once(contact: str, limit: int, out_path: str) -> int:
     final_vacancies = filtered_vacancies[:limit]
     
     # Генерируем красивый отчет
-    report = generate_beautiful_report(final_vacancies, total_found, period_start, period_end)
+    report, stats = generate_beautiful_report(final_vacancies, total_found, period_start, period_end)
     
     # Сохраняем отчет
     try:
-        with open(out_path, "w", encoding="utf-8") as fout:
-            fout.write(report)
+        encoded = report.encode("utf-8")
+        with open(out_path, "wb") as fout:
+            fout.write(encoded)
         logger.info("Report saved to: %s", out_path)
     except Exception as e:
         logger.error("Failed to save report: %s", e)
@@ -602,19 +678,18 @@ async def collect_once(contact: str, limit: int, out_path: str) -> int:
     print(f"• Период: {period_start_moscow.strftime('%d.%m.%Y %H:%M')} - {period_end_moscow.strftime('%d.%m.%Y %H:%M')}")
     
     if final_vacancies:
-        cities = [v['area']['name'] for v in final_vacancies]
-        specs = [detect_specialization(v['name'], v.get('snippet', {})) for v in final_vacancies]
-        city_count = Counter(cities)
-        spec_count = Counter(specs)
+        # Статистика уже посчитана при генерации отчета
+        city_count = stats["city_stats"]
+        spec_count = stats["spec_stats"]
         
         print(f"• Города: {', '.join(f'{city}({count})' for city, count in city_count.most_common(3))}")
         print(f"• Специализации: {', '.join(f'{spec}({count})' for spec, count in spec_count.most_common(3))}")
         
         # Информация о датах
-        newest = parse_date(final_vacancies[0]['published_at'])
-        oldest = parse_date(final_vacancies[-1]['published_at'])
-        newest_moscow = newest.astimezone(moscow_tz)
-        oldest_moscow = oldest.astimezone(moscow_tz)
+        newest = final_vacancies[0]['_published_dt']
+        oldest = final_vacancies[-1]['_published_dt']
+        newest_moscow = newest.astimezone(MOSCOW_TZ)
+        oldest_moscow = oldest.astimezone(MOSCOW_TZ)
         
         print(f"• Диапазон дат: {newest_moscow.strftime('%d.%m.%Y %H:%M')} - {oldest_moscow.strftime('%d.%m.%Y %H:%M')}")
     else: